@@ -4,13 +4,19 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import time
 from hyperliquid_positions import HyperliquidPositionTracker
-from position_logger import PositionLogger
+from position_logger import CSVBackend, PositionLogger, QueuedBackend
 import plotly.express as px
 
 # Initialize
 st.set_page_config(page_title="Hyperliquid Position Monitor", layout="wide")
 tracker = HyperliquidPositionTracker()
-logger = PositionLogger()
+
+@st.cache_resource
+def get_logger():
+    # One logger per process: writes go to a background thread instead of blocking each refresh
+    return PositionLogger(backend=QueuedBackend(CSVBackend()))
+
+logger = get_logger()
 
 def create_position_chart(position_history, metric='unrealized_pnl'):
     fig = px.line(position_history, 
@@ -146,7 +152,10 @@ def main():
         
         with tab1:
             try:
-                position_history = logger.get_position_history(timeframe=timedelta(hours=24))
+                position_history = logger.get_position_history(
+                    timeframe=timedelta(hours=24),
+                    columns=['unrealized_pnl']
+                )
                 if not position_history.empty:
                     st.plotly_chart(create_position_chart(position_history, 'unrealized_pnl'))
                 else:
@@ -156,7 +165,10 @@ def main():
         
         with tab2:
             try:
-                metrics_history = logger.get_metrics_history(timeframe=timedelta(hours=24))
+                metrics_history = logger.get_metrics_history(
+                    timeframe=timedelta(hours=24),
+                    columns=['account_value', 'total_unrealized_pnl', 'portfolio_heat', 'risk_adjusted_return']
+                )
                 if not metrics_history.empty:
                     st.plotly_chart(create_metrics_chart(metrics_history, 'account_value'))
                     st.plotly_chart(create_metrics_chart(metrics_history, 'total_unrealized_pnl'))
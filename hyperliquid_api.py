@@ -1,8 +1,11 @@
 import requests
 import json
+import logging
 from typing import List, Dict, Any, Tuple, Optional
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
 class HyperliquidAPIError(Exception):
     """Custom exception for Hyperliquid API errors"""
     pass
@@ -79,13 +82,15 @@ class HyperliquidAPI:
             
             result = {}
             for idx, coin_info in enumerate(universe):
+                if idx >= len(market_data):
+                    break
+
+                coin_name = coin_info.get('name')
+                if not coin_name:
+                    continue
+                market_info = market_data[idx]
+
                 try:
-                    if idx >= len(market_data):
-                        break
-                        
-                    coin_name = coin_info['name']
-                    market_info = market_data[idx]
-                    
                     # Combine metadata and market data
                     result[coin_name] = {
                         # Metadata
@@ -100,8 +105,8 @@ class HyperliquidAPI:
                         'openInterest': self._safe_float(market_info.get('openInterest')),
                         'dayNtlVlm': self._safe_float(market_info.get('dayNtlVlm'))
                     }
-                except (KeyError, ValueError) as e:
-                    print(f"Warning: Failed to parse market data for {coin_name}: {str(e)}")
+                except (KeyError, ValueError, TypeError) as e:
+                    log.warning("Failed to parse market data for %s: %s", coin_name, e)
                     continue
             
             if not result:
@@ -118,7 +123,8 @@ class HyperliquidAPI:
             if not self.supported_coins:  # Only fetch if we haven't already
                 market_info = self.get_market_info()
             return sorted(list(self.supported_coins))
-        except:
+        except Exception:
+            log.warning("Failed to fetch available coins, using defaults", exc_info=True)
             return ["BTC", "ETH"]  # Fallback to common coins if API fails
     
     @staticmethod
@@ -1,15 +1,23 @@
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import asyncio
 import json
+import logging
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from hyperliquid_api import HyperliquidAPI, HyperliquidAPIError
 import numpy as np
+import aiohttp
 from dotenv import load_dotenv
 
-@dataclass
+log = logging.getLogger(__name__)
+
+STATE_CACHE_TTL = 5.0  # Seconds a clearinghouseState response is reused for the same wallet
+
+@dataclass(slots=True)
 class HyperliquidPosition:
     coin: str
     side: str  # 'long' or 'short'
@@ -33,6 +41,62 @@ class HyperliquidPositionTracker(HyperliquidAPI):
             'min_distance_to_liq': 10,       # Minimum distance to liquidation (%)
             'max_correlation': 0.7           # Maximum correlation between positions
         }
+        self._state_cache: Dict[str, Tuple[float, Dict]] = {}
+
+    def get_clearinghouse_state(self, wallet_address: str) -> Dict:
+        """
+        Fetch the clearinghouseState for a wallet, reusing a response fetched in the last few seconds
+        
+        Positions and the account summary both come from this payload, so fetching them
+        back to back costs one request.
+        
+        Args:
+            wallet_address: User's wallet address in hex format
+            
+        Returns:
+            Dict: Raw clearinghouseState response
+        """
+        now = time.monotonic()
+        cached = self._state_cache.get(wallet_address)
+        if cached is not None and now - cached[0] < STATE_CACHE_TTL:
+            return cached[1]
+        
+        response = self._make_request(f"{self.base_url}/info", {
+            "type": "clearinghouseState",
+            "user": wallet_address
+        })
+        self._state_cache[wallet_address] = (now, response)
+        return response
+
+    async def fetch_clearinghouse_state(self, session: aiohttp.ClientSession, wallet_address: str) -> Dict:
+        """
+        Async variant of get_clearinghouse_state, for fetching several wallets concurrently
+        
+        The response is cached the same way, so get_user_positions and get_account_summary
+        for the wallet parse it without another request.
+        
+        Args:
+            session: aiohttp session to send the request on
+            wallet_address: User's wallet address in hex format
+            
+        Returns:
+            Dict: Raw clearinghouseState response
+        """
+        try:
+            async with session.post(f"{self.base_url}/info", json={
+                "type": "clearinghouseState",
+                "user": wallet_address
+            }, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                state = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # ClientTimeout raises a bare TimeoutError, which isn't a ClientError
+            raise HyperliquidAPIError(f"API request failed: {str(e) or 'request timed out'}")
+        except json.JSONDecodeError as e:
+            raise HyperliquidAPIError(f"Failed to parse API response: {str(e)}")
+        
+        self._state_cache[wallet_address] = (time.monotonic(), state)
+        return state
 
     def _safe_float(self, value, default=0.0):
         """Safely convert value to float, returning default if conversion fails"""
@@ -54,14 +118,12 @@ class HyperliquidPositionTracker(HyperliquidAPI):
             List[HyperliquidPosition]: List of current open positions
         """
         try:
-            response = self._make_request(f"{self.base_url}/info", {
-                "type": "clearinghouseState",
-                "user": wallet_address
-            })
-            
-            # Get current market prices for PnL calculations
-            market_info = self.get_market_info()
+            response = self.get_clearinghouse_state(wallet_address)
+
             positions: List[HyperliquidPosition] = []
+
+            # Snapshot time is shared by every position in the response
+            timestamp = datetime.fromtimestamp(response.get('time', 0) / 1000, tz=timezone.utc)
             
             # Parse position data from response
             if 'assetPositions' in response:
@@ -102,10 +164,10 @@ class HyperliquidPositionTracker(HyperliquidAPI):
                             unrealized_pnl=unrealized_pnl,
                             realized_pnl=realized_pnl,
                             margin_used=margin_used,
-                            timestamp=datetime.fromtimestamp(response.get('time', 0) / 1000)
+                            timestamp=timestamp
                         ))
                     except Exception as e:
-                        print(f"Warning: Failed to parse position for {coin}: {str(e)}")
+                        log.warning("Failed to parse position for %s: %s", coin, e)
                         continue
             
             return positions
@@ -124,10 +186,7 @@ class HyperliquidPositionTracker(HyperliquidAPI):
             Dict: Account summary information
         """
         try:
-            response = self._make_request(f"{self.base_url}/info", {
-                "type": "clearinghouseState",
-                "user": wallet_address
-            })
+            response = self.get_clearinghouse_state(wallet_address)
             
             # Get margin summary from response
             margin_summary = response.get('marginSummary', {})
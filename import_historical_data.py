@@ -1,14 +1,124 @@
 from dotenv import load_dotenv
 import os
+import asyncio
+import csv
+import logging
+import random
+import httpx
 import pandas as pd
-from supabase import create_client
-from datetime import datetime
-import time
+from supabase import acreate_client
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+# pyarrow stays optional; the CSV read settings are shared with position_logger's reader
+from position_logger import ARROW_BLOCK_SIZE, ARROW_COLUMN_TYPES, pa, pa_csv
 
-def import_csv_to_supabase(csv_path, table_name):
+if pa is not None:
+    import pyarrow.compute as pc
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError:  # psycopg is optional; bulk loads go through PostgREST instead
+    psycopg = None
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONCURRENCY = 8
+DEFAULT_CHUNK_SIZE = 10_000
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 0.1  # Seconds; doubled on each retry
+# Plus any 5xx; PGRST000-003 are PostgREST's own 503/504s for a lost database connection
+TRANSIENT_STATUS_CODES = {'408', '429', 'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003'}
+REJECTION_STATUS_CODES = {'400', '409', '422'}
+REJECTION_SQLSTATE_CLASSES = ('22', '23')  # Data exception, integrity constraint violation
+COPY_MIN_BYTES = 1 << 20  # Files at least this large use COPY when SUPABASE_DB_URL is set
+COPY_BLOCK_SIZE = 1 << 16
+
+log = logging.getLogger(__name__)
+
+def _is_transient(error):
+    """Timeouts, rate limits, server errors and network failures are worth retrying"""
+    if isinstance(error, (httpx.TransportError, httpx.TimeoutException)):
+        return True
+    if isinstance(error, APIError):
+        # PostgREST reports the HTTP status as the code when the error body isn't JSON;
+        # JSON errors carry Postgres SQLSTATE or PGRST codes instead
+        code = str(error.code)
+        return code in TRANSIENT_STATUS_CODES or (len(code) == 3 and code.startswith('5'))
+    return False
+
+def _is_rejection(error):
+    """Errors caused by the rows themselves, which splitting the batch can isolate"""
+    if isinstance(error, APIError):
+        code = str(error.code)
+        return code in REJECTION_STATUS_CODES or (len(code) == 5 and code[:2] in REJECTION_SQLSTATE_CLASSES)
+    return False
+
+def _prepare_records(df):
+    """Convert a CSV chunk into JSON-ready insert records"""
+    # Convert timestamp column to ISO 8601 strings (%z is empty for naive timestamps)
+    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%dT%H:%M:%S.%f%z')
+    
+    # Convert all numeric columns to float
+    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns
+    df[numeric_columns] = df[numeric_columns].astype(float)
+    
+    # Convert DataFrame to list of dictionaries column-wise; tolist() yields
+    # native Python scalars without walking the frame row by row
+    columns = list(df.columns)
+    return [dict(zip(columns, row)) for row in zip(*(df[col].tolist() for col in columns))]
+
+def _iter_arrow_records(csv_path):
+    """Stream a CSV through pyarrow, yielding JSON-ready insert records per record batch"""
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(column_types=ARROW_COLUMN_TYPES)
+    )
+    for batch in reader:
+        columns = {}
+        for name, column in zip(batch.schema.names, batch.columns):
+            if pa.types.is_timestamp(column.type):
+                fmt = '%Y-%m-%dT%H:%M:%S%z' if column.type.tz else '%Y-%m-%dT%H:%M:%S'
+                column = pc.strftime(column, format=fmt)
+            elif pa.types.is_integer(column.type):
+                column = column.cast(pa.float64())
+            columns[name] = column
+        yield pa.RecordBatch.from_pydict(columns).to_pylist()
+
+async def _copy_csv_to_postgres(db_url, csv_path, table_name):
+    """Bulk load a CSV with COPY FROM STDIN over a direct Postgres connection"""
+    with open(csv_path, newline='') as f:
+        columns = next(csv.reader(f))
+    
+    query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER true)").format(
+        sql.Identifier(table_name),
+        sql.SQL(', ').join(map(sql.Identifier, columns))
+    )
+    
+    print(f"Copying {csv_path} into {table_name} with COPY")
+    async with await psycopg.AsyncConnection.connect(db_url) as conn:
+        async with conn.cursor() as cur:
+            async with cur.copy(query) as copy:
+                with open(csv_path, 'rb') as f:
+                    while data := f.read(COPY_BLOCK_SIZE):
+                        await copy.write(data)
+            copied = cur.rowcount
+    
+    print(f"\nImport Summary ({table_name}):")
+    print(f"Successfully imported: {copied} records")
+    
+    return copied, 0
+
+async def import_csv_to_supabase(csv_path, table_name, batch_size=DEFAULT_BATCH_SIZE,
+                                 concurrency=DEFAULT_CONCURRENCY, chunksize=DEFAULT_CHUNK_SIZE):
     # Load environment variables
     load_dotenv()
     
+    # Large backfills bypass PostgREST when a direct database connection is configured
+    db_url = os.getenv('SUPABASE_DB_URL')
+    if db_url and psycopg is not None and os.path.getsize(csv_path) >= COPY_MIN_BYTES:
+        return await _copy_csv_to_postgres(db_url, csv_path, table_name)
+    
     # Get Supabase credentials
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_KEY')
@@ -17,73 +127,97 @@ def import_csv_to_supabase(csv_path, table_name):
         raise ValueError("Supabase credentials not found in environment variables")
     
     # Initialize Supabase client
-    supabase = create_client(supabase_url, supabase_key)
-    
-    print(f"Reading CSV file: {csv_path}")
-    df = pd.read_csv(csv_path)
+    supabase = await acreate_client(supabase_url, supabase_key)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def insert(batch_number, batch):
+        """Insert a batch with backoff, splitting it in half if the server rejects its rows"""
+        for attempt in range(MAX_RETRIES):
+            try:
+                await supabase.table(table_name).insert(batch, returning=ReturnMethod.minimal).execute()
+                return len(batch), 0
+            except (APIError, httpx.TransportError, httpx.TimeoutException) as e:
+                if _is_rejection(e):
+                    error = e
+                    break
+                # Auth, permission and schema errors fail every row alike, as does an outage
+                # that outlasts the retries, so splitting would only multiply the requests
+                if not _is_transient(e) or attempt == MAX_RETRIES - 1:
+                    raise
+                await asyncio.sleep(RETRY_BASE_DELAY * (2 ** attempt + random.random()))
+        
+        log.warning("Error importing batch %d (%d records): %s", batch_number, len(batch), error)
+        if len(batch) == 1:
+            return 0, 1
+        
+        mid = len(batch) // 2
+        first = await insert(batch_number, batch[:mid])
+        second = await insert(batch_number, batch[mid:])
+        return first[0] + second[0], first[1] + second[1]
     
-    # Convert timestamp column to proper format
-    df['timestamp'] = pd.to_datetime(df['timestamp']).apply(lambda x: x.isoformat())
+    async def send(batch_number, batch):
+        async with semaphore:
+            log.debug("Importing batch %d (%d records)", batch_number, len(batch))
+            return await insert(batch_number, batch)
     
-    # Convert all numeric columns to float
-    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns
-    for col in numeric_columns:
-        df[col] = df[col].astype(float)
-    
-    # Convert DataFrame to list of dictionaries
-    records = df.to_dict('records')
+    print(f"Reading CSV file: {csv_path}")
     
-    print(f"Found {len(records)} records to import")
+    # Stream the CSV so peak memory is bounded by the chunk size, not the file
+    if pa_csv is not None:
+        chunks = _iter_arrow_records(csv_path)
+    else:
+        chunks = (_prepare_records(chunk) for chunk in pd.read_csv(csv_path, chunksize=chunksize))
     
-    # Insert records in batches
-    batch_size = 100
-    total_batches = len(records) // batch_size + (1 if len(records) % batch_size != 0 else 0)
+    results = []
+    batch_number = 0
+    for records in chunks:
+        log.debug("Read %d records", len(records))
+        
+        # Insert records in batches, keeping up to `concurrency` requests in flight
+        sends = []
+        for i in range(0, len(records), batch_size):
+            batch_number += 1
+            sends.append(send(batch_number, records[i:i + batch_size]))
+        results.extend(await asyncio.gather(*sends))
     
-    successful_imports = 0
-    failed_imports = 0
+    successful_imports = sum(ok for ok, _ in results)
+    failed_imports = sum(failed for _, failed in results)
     
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i + batch_size]
-        batch_number = (i // batch_size) + 1
-        
-        try:
-            print(f"Importing batch {batch_number}/{total_batches} ({len(batch)} records)")
-            supabase.table(table_name).insert(batch).execute()
-            successful_imports += len(batch)
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.1)
-            
-        except Exception as e:
-            print(f"Error importing batch {batch_number}: {str(e)}")
-            failed_imports += len(batch)
-    
-    print("\nImport Summary:")
+    print(f"\nImport Summary ({table_name}):")
     print(f"Successfully imported: {successful_imports} records")
     print(f"Failed to import: {failed_imports} records")
     
     return successful_imports, failed_imports
 
-def main():
+async def main():
+    load_dotenv()
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format="%(message)s")
+    
     # Define the paths to your CSV files
     position_csv = "logs/position_history.csv"
     metrics_csv = "logs/metrics_history.csv"
     
     print("Starting import process...")
     
+    # The tables are independent, so import them concurrently
+    imports = []
+    
     if os.path.exists(position_csv):
         print("\nImporting position history...")
-        import_csv_to_supabase(position_csv, "position_history")
+        imports.append(import_csv_to_supabase(position_csv, "position_history"))
     else:
         print(f"Position history file not found: {position_csv}")
     
     if os.path.exists(metrics_csv):
         print("\nImporting metrics history...")
-        import_csv_to_supabase(metrics_csv, "metrics_history")
+        imports.append(import_csv_to_supabase(metrics_csv, "metrics_history"))
     else:
         print(f"Metrics history file not found: {metrics_csv}")
     
+    await asyncio.gather(*imports)
+    
     print("\nImport process completed!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
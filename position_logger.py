@@ -1,63 +1,408 @@
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+from typing import Optional, Protocol
+import atexit
+import csv
+import httpx
+import logging
 import os
-import json
+import queue
+import threading
+import time
 
-class PositionLogger:
-    def __init__(self, log_dir="logs"):
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; fall back to chunked pandas reads
+    pa = pa_csv = None
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:  # h2 is optional; Supabase requests use HTTP/1.1
+    HTTP2 = False
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; httpx encodes request bodies with stdlib json
+    orjson = None
+
+if orjson is not None:
+    class OrjsonClient(httpx.Client):
+        """httpx client that encodes request bodies and decodes responses with orjson"""
+        def build_request(self, method, url, *, json=None, **kwargs):
+            if json is not None:
+                headers = httpx.Headers(kwargs.get('headers'))
+                headers['Content-Type'] = 'application/json'
+                kwargs.update(content=orjson.dumps(json, option=orjson.OPT_SERIALIZE_NUMPY),
+                              headers=headers)
+            return super().build_request(method, url, **kwargs)
+        
+        def send(self, request, **kwargs):
+            response = super().send(request, **kwargs)
+            # postgrest parses every result set through Response.json()
+            response.json = lambda **_: orjson.loads(response.content)
+            return response
+
+ARROW_BLOCK_SIZE = 1 << 20  # Bytes of CSV per Arrow record batch
+INSERT_BATCH_SIZE = 1000  # Rows per Supabase insert request
+
+log = logging.getLogger(__name__)
+
+# Position attributes logged per row, fetched in one attrgetter call
+POSITION_FIELDS = ('coin', 'side', 'size', 'entry_price', 'leverage', 'liquidation_price',
+                   'unrealized_pnl', 'realized_pnl', 'margin_used')
+POSITION_COLUMNS = ('timestamp',) + POSITION_FIELDS
+_get_position_fields = attrgetter(*POSITION_FIELDS)
+METRICS_COLUMNS = ('timestamp', 'account_value', 'total_position_value', 'total_margin_used', 'free_margin',
+                   'total_unrealized_pnl', 'account_leverage', 'total_exposure', 'exposure_equity_ratio',
+                   'portfolio_heat', 'risk_adjusted_return', 'margin_utilization', 'concentration_score')
+NON_FLOAT_COLUMNS = ('id', 'timestamp', 'coin', 'side')
+# Low-cardinality string columns, stored as categoricals (int codes) instead of Python strs
+CATEGORY_COLUMNS = ('coin', 'side')
+# Arrow infers a column's type from the first block only, so a log whose early rows hold
+# whole numbers (or blanks) would fail to convert later blocks; pin the types up front
+if pa is not None:
+    ARROW_COLUMN_TYPES = {name: pa.float64() for name in POSITION_COLUMNS + METRICS_COLUMNS
+                          if name not in NON_FLOAT_COLUMNS}
+    ARROW_COLUMN_TYPES.update({name: pa.string() for name in CATEGORY_COLUMNS})
+else:
+    ARROW_COLUMN_TYPES = None
+
+def _file_version(path):
+    """Identify the current contents of a log file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+@lru_cache(maxsize=32)
+def _read_log(path, version, columns, coin, cutoff, page_size):
+    """
+    Read a CSV log page by page, keeping only rows that match the filters.
+    
+    Cached on the file version and minute-aligned cutoff; the returned
+    DataFrame is shared between callers and must not be mutated.
+    """
+    if version is None:
+        return pd.DataFrame()
+    
+    pages = []
+    for page in _iter_log_pages(path, columns, page_size):
+        # Convert timestamp column to datetime if it's string
+        page['timestamp'] = pd.to_datetime(page['timestamp'])
+        
+        # Build a single boolean mask so each page is sliced once
+        mask = None
+        if coin:
+            mask = page['coin'].values == coin
+        if cutoff is not None:
+            recent = (page['timestamp'] >= cutoff).values
+            mask = recent if mask is None else mask & recent
+        pages.append(page if mask is None else page.loc[mask])
+    if not pages:
+        return pd.DataFrame()
+    return _categorize(pd.concat(pages, ignore_index=True))
+
+def _categorize(df):
+    """Store the low-cardinality string columns as categoricals"""
+    return df.astype({col: 'category' for col in CATEGORY_COLUMNS if col in df.columns})
+
+def _iter_log_pages(path, columns, page_size):
+    """Yield a CSV log as DataFrames, parsed by pyarrow when it is installed"""
+    if pa_csv is not None:
+        reader = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+            convert_options=pa_csv.ConvertOptions(include_columns=list(columns or []),
+                                                  column_types=ARROW_COLUMN_TYPES)
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=list(columns) if columns else None,
+                               parse_dates=['timestamp'], chunksize=page_size)
+
+class LogBackend(Protocol):
+    """Storage for position and metrics history rows"""
+    def write_positions(self, rows): ...
+    def write_metrics(self, rows): ...
+    def read_positions(self, columns=None, coin=None, cutoff=None) -> pd.DataFrame: ...
+    def read_metrics(self, columns=None, cutoff=None) -> pd.DataFrame: ...
+
+class CSVBackend:
+    """Append-only CSV logs in a local directory"""
+    def __init__(self, log_dir="logs", page_size=50_000):
         self.log_dir = log_dir
+        self.page_size = page_size  # Rows parsed per page when reading history
         self.position_log_file = f"{log_dir}/position_history.csv"
         self.metrics_log_file = f"{log_dir}/metrics_history.csv"
         
         # Create log directory if it doesn't exist
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
+    
+    def _load(self, path, columns=None, coin=None, cutoff=None):
+        """Load a history log on demand; an empty DataFrame if nothing has been logged yet"""
+        return _read_log(path, _file_version(path), columns, coin, cutoff, self.page_size)
+    
+    def _append_rows(self, path, rows):
+        """Append rows to a CSV log, writing the header only for a new file"""
+        if not rows:
+            return
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+    
+    def write_positions(self, rows):
+        self._append_rows(self.position_log_file, rows)
+    
+    def write_metrics(self, rows):
+        self._append_rows(self.metrics_log_file, rows)
+    
+    def read_positions(self, columns=None, coin=None, cutoff=None):
+        return self._load(self.position_log_file, columns, coin, cutoff)
+    
+    def read_metrics(self, columns=None, cutoff=None):
+        return self._load(self.metrics_log_file, columns, cutoff=cutoff)
+
+def _rows_to_df(rows, columns=None):
+    """Build a DataFrame column by column from API rows, with float64 numerics"""
+    if not rows:
+        return pd.DataFrame(columns=list(columns) if columns else None)
+    columns = list(columns) if columns else list(rows[0])
+    if pa is not None:
+        # Arrow builds each column straight into a typed buffer, with None as null
+        df = pa.Table.from_pylist(rows).select(columns).to_pandas()
+    else:
+        df = pd.DataFrame({col: [row.get(col) for row in rows] for col in columns}, columns=columns)
+    # PostgREST always returns ISO 8601, so skip pandas' per-value format inference
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    return _categorize(df.astype({col: 'float64' for col in columns if col not in NON_FLOAT_COLUMNS}))
+
+@lru_cache(maxsize=4)
+def _create_supabase(supabase_url, supabase_key):
+    """Create one pooled Supabase client per (url, key) for the life of the process"""
+    from supabase import ClientOptions, create_client
+    
+    client_class = OrjsonClient if orjson is not None else httpx.Client
+    http_client = client_class(
+        http2=HTTP2,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=1800),
+        timeout=30.0
+    )
+    return create_client(supabase_url, supabase_key, options=ClientOptions(httpx_client=http_client))
+
+@lru_cache(maxsize=1)
+def _get_supabase():
+    """Create the process-wide Supabase client from the environment on first use"""
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    supabase_url = os.getenv('SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_KEY')
+    if not supabase_url or not supabase_key:
+        raise ValueError("Supabase credentials not found in environment variables")
+    return _create_supabase(supabase_url, supabase_key)
+
+class SupabaseBackend:
+    """
+    position_history / metrics_history tables in Supabase.
+    
+    Reads are cached for `cache_ttl` seconds per (table, columns, coin, cutoff); the
+    cutoff is minute-aligned by PositionLogger, so the key changes at least once a
+    minute. Writes through this backend clear the cache. Cached DataFrames are shared
+    between callers and must not be mutated.
+    """
+    def __init__(self, client=None, page_size=1000, cache_ttl=60.0):
+        # Share one client (and its keep-alive connection pool) across backends
+        self.supabase = client if client is not None else _get_supabase()
+        self.page_size = page_size  # PostgREST returns at most 1000 rows per request by default
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+        # QueuedBackend writes from its own thread, so cache updates are serialized
+        self._cache_lock = threading.Lock()
+        self._writes = 0  # Bumped by every write, so a read that overlaps one isn't cached
+    
+    def _insert(self, table, rows):
+        from postgrest.types import ReturnMethod
+        
+        # Coalesced writes from QueuedBackend can be large; keep each request to one batch.
+        # return=minimal stops PostgREST echoing the inserted rows back.
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            self.supabase.table(table).insert(
+                rows[i:i + INSERT_BATCH_SIZE], returning=ReturnMethod.minimal
+            ).execute()
+        if rows:
+            with self._cache_lock:
+                self._writes += 1
+                self._cache.clear()
+    
+    def _select(self, table, columns=None, coin=None, cutoff=None):
+        """Fetch matching rows oldest first, serving repeat reads from the TTL cache"""
+        key = (table, columns, coin, cutoff)
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
             
-        # Initialize or load existing logs
-        self.position_history = self._load_or_create_position_log()
-        self.metrics_history = self._load_or_create_metrics_log()
+            # Drop expired entries so the cache doesn't grow with every minute's cutoff
+            for k in [k for k, v in self._cache.items() if v[0] <= now]:
+                del self._cache[k]
+            writes = self._writes
+        
+        df = self._fetch(table, columns, coin, cutoff)
+        with self._cache_lock:
+            # Rows written while the fetch was in flight may be missing from it
+            if self._writes == writes:
+                self._cache[key] = (now + self.cache_ttl, df)
+        return df
     
-    def _load_or_create_position_log(self):
-        if os.path.exists(self.position_log_file):
-            return pd.read_csv(self.position_log_file)
-        return pd.DataFrame()
+    def _fetch(self, table, columns=None, coin=None, cutoff=None):
+        """Fetch matching rows oldest first, seeking past each page on (timestamp, id)"""
+        # Rows in one tick share a timestamp, so the primary key breaks ties in the cursor
+        select = columns if 'id' in columns else (*columns, 'id')
+        
+        rows = []
+        last = None
+        while True:
+            q = self.supabase.table(table).select(",".join(select))
+            if coin:
+                q = q.eq('coin', coin)
+            if cutoff is not None:
+                q = q.gte('timestamp', cutoff.isoformat())
+            if last is not None:
+                # Keyset pagination rides the timestamp index instead of re-scanning an offset
+                ts = last['timestamp']
+                q = q.or_(f'timestamp.gt."{ts}",and(timestamp.eq."{ts}",id.gt.{last["id"]})')
+            page = q.order('timestamp').order('id').limit(self.page_size).execute().data
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+            last = page[-1]
+        
+        # Null numerics arrive as None, so dtypes are set explicitly rather than inferred
+        return _rows_to_df(rows, columns)
     
-    def _load_or_create_metrics_log(self):
-        if os.path.exists(self.metrics_log_file):
-            return pd.read_csv(self.metrics_log_file)
-        return pd.DataFrame()
+    def write_positions(self, rows):
+        self._insert('position_history', rows)
+    
+    def write_metrics(self, rows):
+        self._insert('metrics_history', rows)
+    
+    def read_positions(self, columns=None, coin=None, cutoff=None):
+        return self._select('position_history', columns or POSITION_COLUMNS, coin, cutoff)
+    
+    def read_metrics(self, columns=None, cutoff=None):
+        return self._select('metrics_history', columns or METRICS_COLUMNS, cutoff=cutoff)
+
+class QueuedBackend:
+    """
+    Wrap a backend so writes happen on a daemon thread and log_* calls return immediately.
+    
+    Writes that arrive within `linger` seconds of each other are coalesced into one
+    write per table, and the per-table writes run concurrently. Reads flush pending
+    writes first; pending writes are also flushed at interpreter exit.
+    """
+    def __init__(self, backend: LogBackend, max_queue=10_000, linger=0.2):
+        self.backend = backend
+        self.linger = linger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="position-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+    
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.linger
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            batches = {}
+            for method, rows in items:
+                batches.setdefault(method, []).extend(rows)
+            # Tables are independent, so overlap their round-trips rather than paying each in turn
+            *others, last = batches.items()
+            writers = []
+            for batch in others:
+                writer = threading.Thread(target=self._write, args=batch)
+                try:
+                    writer.start()
+                    writers.append(writer)
+                except RuntimeError:  # No new threads once the interpreter is shutting down
+                    self._write(*batch)
+            self._write(*last)
+            for writer in writers:
+                writer.join()
+            
+            for _ in items:
+                self._queue.task_done()
+    
+    def _write(self, method, rows):
+        try:
+            getattr(self.backend, method)(rows)
+        except Exception:
+            log.exception("Background %s failed for %d rows", method, len(rows))
+    
+    def flush(self):
+        """Block until every queued write has been handed to the backend"""
+        self._queue.join()
+    
+    def write_positions(self, rows):
+        self._queue.put(('write_positions', rows))
+    
+    def write_metrics(self, rows):
+        self._queue.put(('write_metrics', rows))
+    
+    def read_positions(self, columns=None, coin=None, cutoff=None):
+        self.flush()
+        return self.backend.read_positions(columns, coin, cutoff)
+    
+    def read_metrics(self, columns=None, cutoff=None):
+        self.flush()
+        return self.backend.read_metrics(columns, cutoff)
+
+class PositionLogger:
+    def __init__(self, log_dir="logs", page_size=50_000, backend: Optional[LogBackend] = None):
+        # Local CSV logs unless another backend (e.g. SupabaseBackend) is supplied
+        self.backend = backend if backend is not None else CSVBackend(log_dir, page_size)
+    
+    @staticmethod
+    def _cutoff(timeframe):
+        """Start of the requested window, aligned to the minute so it can key the read cache"""
+        return (pd.Timestamp.now() - timeframe).floor('min') if timeframe else None
     
     def log_positions(self, positions, timestamp=None):
         if timestamp is None:
             timestamp = datetime.now()
+        
+        # Format the shared timestamp once rather than once per row
+        timestamp = str(timestamp)
             
-        for position in positions:
-            position_data = {
-                'timestamp': timestamp,
-                'coin': position.coin,
-                'side': position.side,
-                'size': position.size,
-                'entry_price': position.entry_price,
-                'leverage': position.leverage,
-                'liquidation_price': position.liquidation_price,
-                'unrealized_pnl': position.unrealized_pnl,
-                'realized_pnl': position.realized_pnl,
-                'margin_used': position.margin_used
-            }
-            
-            self.position_history = pd.concat([
-                self.position_history,
-                pd.DataFrame([position_data])
-            ])
+        rows = [
+            dict(zip(POSITION_COLUMNS, (timestamp, *_get_position_fields(position))))
+            for position in positions
+        ]
             
-        self.position_history.to_csv(self.position_log_file, index=False)
+        self.backend.write_positions(rows)
     
     def log_metrics(self, metrics, summary, timestamp=None):
         if timestamp is None:
             timestamp = datetime.now()
             
         metrics_data = {
-            'timestamp': timestamp,
+            'timestamp': str(timestamp),
             'account_value': summary['account_value'],
             'total_position_value': summary['total_position_value'],
             'total_margin_used': summary['total_margin_used'],
@@ -72,29 +417,15 @@ class PositionLogger:
             'concentration_score': metrics['portfolio_risks']['concentration_score']
         }
         
-        self.metrics_history = pd.concat([
-            self.metrics_history,
-            pd.DataFrame([metrics_data])
-        ])
-        
-        self.metrics_history.to_csv(self.metrics_log_file, index=False)
+        self.backend.write_metrics([metrics_data])
     
-    def get_position_history(self, coin=None, timeframe=None):
-        df = self.position_history.copy()
-        if coin:
-            df = df[df['coin'] == coin]
-        if timeframe:
-            # Convert timestamp column to datetime if it's string
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            cutoff_time = pd.Timestamp.now() - timeframe
-            df = df[df['timestamp'] >= cutoff_time]
-        return df
+    def get_position_history(self, coin=None, timeframe=None, columns=None):
+        if columns is not None:
+            # Filters need timestamp and coin even if the caller doesn't
+            columns = tuple(dict.fromkeys(['timestamp', 'coin', *columns]))
+        return self.backend.read_positions(columns, coin, self._cutoff(timeframe))
     
-    def get_metrics_history(self, timeframe=None):
-        df = self.metrics_history.copy()
-        if timeframe:
-            # Convert timestamp column to datetime if it's string
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            cutoff_time = pd.Timestamp.now() - timeframe
-            df = df[df['timestamp'] >= cutoff_time]
-        return df 
\ No newline at end of file
+    def get_metrics_history(self, timeframe=None, columns=None):
+        if columns is not None:
+            columns = tuple(dict.fromkeys(['timestamp', *columns]))
+        return self.backend.read_metrics(columns, cutoff=self._cutoff(timeframe)) 
\ No newline at end of file
@@ -1,13 +1,21 @@
 from typing import List, Dict, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 import numpy as np
 
+INITIAL_CAPACITY = 16  # Position slots preallocated per RiskManager
+# Per-position NumPy columns kept by RiskManager, all grown together
+POSITION_COLUMNS = ('_sizes', '_entry_prices', '_leverages', '_unrealized_pnl',
+                    '_liquidation_prices', '_signs', '_values')
+
 class Side(Enum):
     LONG = "LONG"
     SHORT = "SHORT"
 
-@dataclass
+# Direction of PnL for each side: +1 gains when price rises, -1 when it falls
+SIDE_SIGN = {Side.LONG: 1, Side.SHORT: -1}
+
+@dataclass(slots=True, frozen=True)
 class Position:
     symbol: str
     side: Side
@@ -18,6 +26,14 @@ class Position:
     unrealized_pnl: float = 0.0
 
 class RiskManager:
+    """
+    Risk limits and portfolio metrics over a set of positions
+    
+    Portfolio totals are computed from array copies of the positions' numeric fields, so
+    positions can only change through RiskManager methods (add_position, try_add_batch,
+    update_unrealized_pnl). Position is frozen and `positions` is a read-only tuple, so
+    a change made any other way fails instead of leaving the totals stale.
+    """
     def __init__(self, 
                  account_equity: float,
                  max_position_size_usd: float = 100000,
@@ -34,20 +50,180 @@ class RiskManager:
             max_drawdown_pct: Maximum allowed drawdown percentage
             max_position_pct: Maximum single position size as % of equity
         """
-        self.account_equity = account_equity
         self.max_position_size_usd = max_position_size_usd
         self.max_leverage = max_leverage
         self.max_drawdown_pct = max_drawdown_pct
-        self.max_position_pct = max_position_pct
-        self.positions: List[Position] = []
+        self._max_position_pct = max_position_pct
+        self.account_equity = account_equity
+        self._positions: List[Position] = []
+        self._by_symbol: Dict[str, int] = {}  # Symbol -> index of its first position
+
+        # Numeric fields of self._positions as parallel arrays (struct of arrays), so
+        # portfolio totals are computed in NumPy rather than a Python loop
+        self._sizes = np.empty(INITIAL_CAPACITY)
+        self._entry_prices = np.empty(INITIAL_CAPACITY)
+        self._leverages = np.empty(INITIAL_CAPACITY)
+        self._unrealized_pnl = np.empty(INITIAL_CAPACITY)
+        self._liquidation_prices = np.empty(INITIAL_CAPACITY)
+        self._signs = np.empty(INITIAL_CAPACITY, dtype=np.int8)
+        self._values = np.empty(INITIAL_CAPACITY)  # Scratch space for size * entry_price
+
+        # (total_position_value, total_exposure, unrealized_pnl), or None when positions changed
+        self._totals: Optional[tuple] = None
+
+    @property
+    def positions(self) -> tuple:
+        """Current positions, in the order they were added"""
+        return tuple(self._positions)
+
+    @property
+    def account_equity(self) -> float:
+        return self._account_equity
+
+    @account_equity.setter
+    def account_equity(self, value: float):
+        self._account_equity = value
+        self._update_equity_limits()
+
+    @property
+    def max_position_pct(self) -> float:
+        return self._max_position_pct
+
+    @max_position_pct.setter
+    def max_position_pct(self, value: float):
+        self._max_position_pct = value
+        self._update_equity_limits()
+
+    def _update_equity_limits(self):
+        """Precompute the equity-derived factors used on every check, so they aren't re-divided per call"""
+        # Multiplier turning a USD value into % of equity; zero equity makes every position infinitely large
+        self._equity_pct_scale = 100.0 / self._account_equity if self._account_equity else float('inf')
+        self._max_position_equity = self._account_equity * (self._max_position_pct / 100)
 
     def add_position(self, position: Position) -> bool:
         """Add a new position and check if it meets risk parameters"""
         if self._validate_position(position):
-            self.positions.append(position)
+            self._store(position)
+            self._by_symbol.setdefault(position.symbol, len(self._positions))
+            self._positions.append(position)
+            self._totals = None
             return True
         return False
 
+    def try_add_batch(self, symbols, sides, sizes, entry_prices, leverages,
+                      liquidation_prices=None) -> np.ndarray:
+        """
+        Validate many positions at once and add the ones that meet risk parameters
+        
+        Args:
+            symbols: Symbol of each position
+            sides: Side of each position
+            sizes: Position sizes
+            entry_prices: Entry prices
+            leverages: Position leverages
+            liquidation_prices: Liquidation prices, 0 where unknown (optional)
+            
+        Returns:
+            np.ndarray: Boolean mask of the positions that were added
+        """
+        sizes = np.asarray(sizes, dtype=np.float64)
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        leverages = np.asarray(leverages, dtype=np.float64)
+        if liquidation_prices is None:
+            liquidation_prices = np.zeros(len(sizes))
+        liquidation_prices = np.asarray(liquidation_prices, dtype=np.float64)
+
+        # Same checks as _validate_position, over every position at once. The checks are
+        # negated "exceeds" tests so NaN (a zero-value position at zero equity) passes as it does there
+        position_values = sizes * entry_prices
+        with np.errstate(invalid='ignore'):
+            accepted = ~(
+                (leverages > self.max_leverage)
+                | (position_values > self.max_position_size_usd)
+                | (position_values * self._equity_pct_scale > self.max_position_pct)
+            )
+
+        indices = np.flatnonzero(accepted)
+        n, k = len(self._positions), len(indices)
+        self._reserve(n + k)
+        self._sizes[n:n + k] = sizes[indices]
+        self._entry_prices[n:n + k] = entry_prices[indices]
+        self._leverages[n:n + k] = leverages[indices]
+        self._unrealized_pnl[n:n + k] = 0.0
+        self._liquidation_prices[n:n + k] = liquidation_prices[indices]
+        self._signs[n:n + k] = [SIDE_SIGN[sides[i]] for i in indices]
+
+        for i in indices:
+            position = Position(
+                symbol=symbols[i],
+                side=sides[i],
+                size=float(sizes[i]),
+                entry_price=float(entry_prices[i]),
+                leverage=float(leverages[i]),
+                liquidation_price=float(liquidation_prices[i]) or None
+            )
+            self._by_symbol.setdefault(position.symbol, len(self._positions))
+            self._positions.append(position)
+
+        if k:
+            self._totals = None
+        return accepted
+
+    def get_position(self, symbol: str) -> Optional[Position]:
+        """Look up a position by symbol"""
+        index = self._by_symbol.get(symbol)
+        return self._positions[index] if index is not None else None
+
+    def update_unrealized_pnl(self, index: int, unrealized_pnl: float):
+        """Update the unrealized PnL of the position at `index`, patching cached totals in place"""
+        # The arrays have spare capacity past the last position, so a negative or too-large
+        # index would hit an unused slot there while the list wraps or raises
+        if not 0 <= index < len(self._positions):
+            raise IndexError(f"position index {index} out of range")
+        previous = float(self._unrealized_pnl[index])
+        self._unrealized_pnl[index] = unrealized_pnl
+        self._positions[index] = replace(self._positions[index], unrealized_pnl=unrealized_pnl)
+        if self._totals is not None:
+            total_position_value, total_exposure, total_pnl = self._totals
+            self._totals = (total_position_value, total_exposure, total_pnl + unrealized_pnl - previous)
+
+    def _portfolio_totals(self) -> tuple:
+        """Portfolio sums, recomputed only after positions are added"""
+        if self._totals is None:
+            n = len(self._positions)
+            position_values = np.multiply(self._sizes[:n], self._entry_prices[:n], out=self._values[:n])
+            self._totals = (
+                float(position_values.sum()),
+                float(position_values @ self._leverages[:n]),  # Exposure as one dot product
+                float(self._unrealized_pnl[:n].sum())
+            )
+        return self._totals
+
+    def _reserve(self, count: int):
+        """Make room for `count` positions, doubling capacity so appends stay amortized O(1)"""
+        capacity = len(self._sizes)
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        for name in POSITION_COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _store(self, position: Position):
+        """Write a position's numeric fields into the next array slot, growing the arrays if full"""
+        n = len(self._positions)
+        self._reserve(n + 1)
+
+        self._sizes[n] = position.size
+        self._entry_prices[n] = position.entry_price
+        self._leverages[n] = position.leverage
+        self._unrealized_pnl[n] = position.unrealized_pnl
+        self._liquidation_prices[n] = position.liquidation_price or 0.0
+        self._signs[n] = SIDE_SIGN[position.side]
+
     def _validate_position(self, position: Position) -> bool:
         """Validate if a new position meets risk parameters"""
         # Check leverage limits
@@ -60,7 +236,7 @@ class RiskManager:
             return False
 
         # Check position size as percentage of equity
-        position_pct = (position_value / self.account_equity) * 100
+        position_pct = position_value * self._equity_pct_scale
         if position_pct > self.max_position_pct:
             return False
 
@@ -68,15 +244,7 @@ class RiskManager:
 
     def calculate_portfolio_metrics(self) -> Dict:
         """Calculate overall portfolio risk metrics"""
-        total_position_value = 0
-        total_exposure = 0
-        unrealized_pnl = 0
-
-        for position in self.positions:
-            position_value = position.size * position.entry_price
-            total_position_value += position_value
-            total_exposure += position_value * position.leverage
-            unrealized_pnl += position.unrealized_pnl
+        total_position_value, total_exposure, unrealized_pnl = self._portfolio_totals()
 
         portfolio_leverage = total_exposure / self.account_equity if self.account_equity > 0 else 0
 
@@ -85,7 +253,7 @@ class RiskManager:
             "total_exposure": total_exposure,
             "portfolio_leverage": portfolio_leverage,
             "unrealized_pnl": unrealized_pnl,
-            "equity_usage_pct": (total_position_value / self.account_equity) * 100
+            "equity_usage_pct": total_position_value * self._equity_pct_scale
         }
 
     def calculate_position_risk(self, position: Position, current_price: float) -> Dict:
@@ -93,11 +261,10 @@ class RiskManager:
         position_value = position.size * position.entry_price
         current_value = position.size * current_price
         
+        sign = SIDE_SIGN[position.side]
+
         # Calculate unrealized PnL
-        if position.side == Side.LONG:
-            unrealized_pnl = current_value - position_value
-        else:
-            unrealized_pnl = position_value - current_value
+        unrealized_pnl = sign * (current_value - position_value)
 
         # Calculate ROE (Return on Equity)
         roe = (unrealized_pnl / (position_value / position.leverage)) * 100
@@ -105,22 +272,46 @@ class RiskManager:
         # Calculate distance to liquidation
         distance_to_liq = 0
         if position.liquidation_price:
-            if position.side == Side.LONG:
-                distance_to_liq = ((current_price - position.liquidation_price) / current_price) * 100
-            else:
-                distance_to_liq = ((position.liquidation_price - current_price) / current_price) * 100
+            distance_to_liq = sign * ((current_price - position.liquidation_price) / current_price) * 100
+
+        return {
+            "position_value": position_value,
+            "unrealized_pnl": unrealized_pnl,
+            "roe": roe,
+            "distance_to_liquidation": distance_to_liq,
+            "equity_usage_pct": position_value * self._equity_pct_scale
+        }
+
+    def batch_position_risk(self, current_prices) -> Dict:
+        """
+        Calculate risk metrics for every position at once
+        
+        Args:
+            current_prices: Current price of each position, in the order of self.positions
+            
+        Returns:
+            Dict: Same keys as calculate_position_risk, each an array with one entry per position
+        """
+        # Imported here so the CLI doesn't load (and JIT) Numba unless batch risk is used
+        from risk_kernels import batch_position_risk
+
+        n = len(self._positions)
+        position_value, unrealized_pnl, roe, distance_to_liq = batch_position_risk(
+            self._sizes[:n], self._entry_prices[:n], self._leverages[:n], self._signs[:n],
+            self._liquidation_prices[:n], np.asarray(current_prices, dtype=np.float64)
+        )
 
         return {
             "position_value": position_value,
             "unrealized_pnl": unrealized_pnl,
             "roe": roe,
             "distance_to_liquidation": distance_to_liq,
-            "equity_usage_pct": (position_value / self.account_equity) * 100
+            "equity_usage_pct": position_value * self._equity_pct_scale
         }
 
     def check_drawdown(self, initial_equity: float) -> Dict:
         """Check current drawdown against maximum allowed drawdown"""
-        current_equity = self.account_equity + sum(p.unrealized_pnl for p in self.positions)
+        current_equity = self.account_equity + self._portfolio_totals()[2]
         drawdown_pct = ((initial_equity - current_equity) / initial_equity) * 100
         
         return {
@@ -129,6 +320,18 @@ class RiskManager:
             "remaining_drawdown": self.max_drawdown_pct - drawdown_pct
         }
 
+    def check_drawdown_series(self, equity_series) -> Dict:
+        """Check the maximum drawdown over a history of equity samples against maximum allowed drawdown"""
+        from risk_kernels import running_max_drawdown
+
+        drawdown_pct = running_max_drawdown(np.asarray(equity_series, dtype=np.float64))
+
+        return {
+            "max_drawdown_pct": drawdown_pct,
+            "max_drawdown_warning": drawdown_pct > self.max_drawdown_pct,
+            "remaining_drawdown": self.max_drawdown_pct - drawdown_pct
+        }
+
     def get_position_correlation(self, positions: List[Position]) -> float:
         """Calculate correlation between position returns (if historical data available)"""
         # This would require historical price data implementation
@@ -136,6 +339,6 @@ class RiskManager:
 
     def suggest_position_size(self, price: float, leverage: float) -> float:
         """Suggest a position size based on current portfolio risk"""
-        available_equity = self.account_equity * (self.max_position_pct / 100)
+        available_equity = self._max_position_equity
         suggested_size = (available_equity * leverage) / price
         return min(suggested_size, self.max_position_size_usd / price)
@@ -3,6 +3,18 @@ from typing import Optional
 import cmd
 import json
 
+# One encoder shared by all command output instead of a new one per call
+_ENCODER = json.JSONEncoder(indent=2)
+
+# Defaults for init's optional max_position_size_usd, max_leverage, max_drawdown_pct, max_position_pct
+INIT_DEFAULTS = (100000.0, 10.0, 15.0, 20.0)
+
+# Accepted spellings of a position side, matched case-insensitively
+_SIDE_MAP = {
+    'long': Side.LONG, 'l': Side.LONG, 'buy': Side.LONG, 'b': Side.LONG,
+    'short': Side.SHORT, 's': Side.SHORT, 'sell': Side.SHORT,
+}
+
 class RiskManagerCLI(cmd.Cmd):
     intro = 'Welcome to the Risk Management System. Type help or ? to list commands.\n'
     prompt = '(risk) '
@@ -17,13 +29,11 @@ class RiskManagerCLI(cmd.Cmd):
         Initialize risk manager with: account_equity [max_position_size_usd] [max_leverage] [max_drawdown_pct] [max_position_pct]
         Example: init 10000 50000 10 15 20
         """
-        args = arg.split()
         try:
-            account_equity = float(args[0])
-            max_position_size_usd = float(args[1]) if len(args) > 1 else 100000
-            max_leverage = float(args[2]) if len(args) > 2 else 10
-            max_drawdown_pct = float(args[3]) if len(args) > 3 else 15
-            max_position_pct = float(args[4]) if len(args) > 4 else 20
+            # Convert every argument in one pass, then pad the missing limits with defaults
+            account_equity, *limits = map(float, arg.split())
+            limits += INIT_DEFAULTS[len(limits):]
+            max_position_size_usd, max_leverage, max_drawdown_pct, max_position_pct = limits[:4]
 
             self.risk_manager = RiskManager(
                 account_equity=account_equity,
@@ -46,14 +56,14 @@ class RiskManagerCLI(cmd.Cmd):
             print("Please initialize the risk manager first using 'init'")
             return
 
-        args = arg.split()
         try:
-            symbol = args[0]
-            side = Side[args[1].upper()]
-            size = float(args[2])
-            entry_price = float(args[3])
-            leverage = float(args[4])
-            liquidation_price = float(args[5]) if len(args) > 5 else None
+            symbol, side_name, *numbers = arg.split()
+            side = _SIDE_MAP.get(side_name.lower())
+            if side is None:
+                print(f"Error: Invalid side '{side_name}', expected LONG or SHORT")
+                return
+            size, entry_price, leverage, *optional = map(float, numbers)
+            liquidation_price = optional[0] if optional else None
 
             position = Position(
                 symbol=symbol,
@@ -78,7 +88,7 @@ class RiskManagerCLI(cmd.Cmd):
             return
 
         metrics = self.risk_manager.calculate_portfolio_metrics()
-        print(json.dumps(metrics, indent=2))
+        print(_ENCODER.encode(metrics))
 
     def do_position_risk(self, arg):
         """
@@ -94,12 +104,12 @@ class RiskManagerCLI(cmd.Cmd):
             symbol = args[0]
             current_price = float(args[1])
 
-            for position in self.risk_manager.positions:
-                if position.symbol == symbol:
-                    risk_metrics = self.risk_manager.calculate_position_risk(position, current_price)
-                    print(json.dumps(risk_metrics, indent=2))
-                    return
-            print(f"No position found for symbol: {symbol}")
+            position = self.risk_manager.get_position(symbol)
+            if position is None:
+                print(f"No position found for symbol: {symbol}")
+                return
+            risk_metrics = self.risk_manager.calculate_position_risk(position, current_price)
+            print(_ENCODER.encode(risk_metrics))
         except (IndexError, ValueError):
             print("Error: Please provide valid symbol and current price")
 
@@ -110,7 +120,7 @@ class RiskManagerCLI(cmd.Cmd):
             return
 
         drawdown_info = self.risk_manager.check_drawdown(self.initial_equity)
-        print(json.dumps(drawdown_info, indent=2))
+        print(_ENCODER.encode(drawdown_info))
 
     def do_suggest_size(self, arg):
         """
@@ -0,0 +1,61 @@
+"""Array kernels for per-position risk, compiled with Numba when it is installed"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernels run as plain NumPy
+    njit = None
+
+PARALLEL_MIN_POSITIONS = 10_000  # Below this, starting worker threads costs more than it saves
+
+def _position_risk(sizes, entry_prices, leverages, signs, liquidation_prices, current_prices):
+    position_values = sizes * entry_prices
+    current_values = sizes * current_prices
+    # Multiplying by the side's sign replaces a per-position long/short branch
+    unrealized_pnl = signs * (current_values - position_values)
+    roe = (unrealized_pnl / (position_values / leverages)) * 100
+    price_gap = signs * (current_prices - liquidation_prices)
+    distance_to_liq = np.where(liquidation_prices != 0, (price_gap / current_prices) * 100, 0.0)
+    return position_values, unrealized_pnl, roe, distance_to_liq
+
+if njit is not None:
+    # Numba fuses the array expressions above into a single loop without temporaries;
+    # with parallel=True that loop is also split across cores. Numba's on-disk cache is
+    # keyed by function and signature, not compile options, so only one build of the
+    # shared function can be cached; a cached parallel build would load the serial one.
+    _position_risk_serial = njit(cache=True, fastmath=True)(_position_risk)
+    _position_risk_parallel = njit(fastmath=True, parallel=True)(_position_risk)
+
+    # Compile (or load from the cache) when the module is first imported. risk.py imports
+    # it lazily, so this lands in the first batch call rather than at CLI startup.
+    _ones = np.ones(1)
+    _position_risk_serial(_ones, _ones, _ones, np.ones(1, dtype=np.int8), _ones, _ones)
+else:
+    _position_risk_serial = _position_risk_parallel = _position_risk
+
+def batch_position_risk(sizes, entry_prices, leverages, signs, liquidation_prices, current_prices):
+    """
+    Calculate risk metrics for N positions at once from parallel arrays
+
+    Large batches (e.g. positions from many wallets stacked together) run across all cores.
+
+    Args:
+        sizes: Position sizes
+        entry_prices: Entry prices
+        leverages: Position leverages
+        signs: +1 for long positions, -1 for short
+        liquidation_prices: Liquidation prices, 0 where unknown
+        current_prices: Current mark prices
+
+    Returns:
+        Tuple of arrays: (position_value, unrealized_pnl, roe, distance_to_liquidation)
+    """
+    kernel = _position_risk_parallel if len(sizes) >= PARALLEL_MIN_POSITIONS else _position_risk_serial
+    return kernel(sizes, entry_prices, leverages, signs, liquidation_prices, current_prices)
+
+def running_max_drawdown(equity):
+    """Largest drop from a running peak in an equity series, as a percentage of that peak"""
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    return float(((peak - equity) / peak).max() * 100)
@@ -0,0 +1,47 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip('streamlit')
+from streamlit.testing.v1 import AppTest
+
+import hyperliquid_positions
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard.py')
+
+CLEARINGHOUSE_STATE = {
+    'time': 1700000000000,
+    'assetPositions': [{'position': {
+        'coin': 'BTC', 'szi': '0.5', 'leverage': {'value': 5}, 'entryPx': '40000',
+        'liquidationPx': '32000', 'marginUsed': '4000', 'unrealizedPnl': '250', 'realizedPnl': '0',
+    }}],
+    'marginSummary': {'accountValue': '20000', 'totalNtlPos': '20000', 'totalMarginUsed': '4000'},
+    'withdrawable': '16000',
+}
+
+def test_refresh_logs_and_charts_history(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(hyperliquid_positions.HyperliquidPositionTracker, 'get_clearinghouse_state',
+                        lambda self, wallet_address: CLEARINGHOUSE_STATE)
+    real_sleep = time.sleep
+    # The page sleeps and reruns itself at the end of every refresh
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr('streamlit.rerun', lambda: None)
+    
+    app = AppTest.from_file(DASHBOARD, default_timeout=30)
+    app.run()
+    assert not app.exception
+    assert [error.value for error in app.error] == []
+    
+    # Writes are queued; wait for the background thread to land them before refreshing again
+    logs = tmp_path / 'logs'
+    deadline = time.monotonic() + 5
+    while not all((logs / name).exists() and (logs / name).stat().st_size for name in ('position_history.csv', 'metrics_history.csv')):
+        assert time.monotonic() < deadline, 'queued log writes never reached disk'
+        real_sleep(0.05)
+    
+    app.run()
+    assert [error.value for error in app.error] == []
+    # The second refresh charts the rows queued by the first
+    assert not [info.value for info in app.info if 'No historical' in info.value]
@@ -0,0 +1,13 @@
+from hyperliquid_api import HyperliquidAPI
+
+def test_market_info_skips_nameless_coins(monkeypatch):
+    response = [
+        {'universe': [{'name': 'BTC', 'szDecimals': 5, 'maxLeverage': 50}, {'szDecimals': 2}, {'name': ''}]},
+        [{'markPx': '40000', 'funding': '0.0001'}, {'markPx': '1'}, {'markPx': '2'}],
+    ]
+    api = HyperliquidAPI()
+    monkeypatch.setattr(api, '_make_request', lambda endpoint, payload=None: response)
+    
+    market_info = api.get_market_info()
+    assert list(market_info) == ['BTC']
+    assert market_info['BTC']['maxLeverage'] == 50
@@ -0,0 +1,28 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from hyperliquid_api import HyperliquidAPIError
+from hyperliquid_positions import HyperliquidPositionTracker
+
+class FailingSession:
+    """Stands in for aiohttp.ClientSession, failing every request with `error`"""
+    def __init__(self, error):
+        self.error = error
+    
+    def post(self, url, **kwargs):
+        return self
+    
+    async def __aenter__(self):
+        raise self.error
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+@pytest.mark.parametrize('error', [asyncio.TimeoutError(), aiohttp.ClientConnectionError('refused')])
+def test_fetch_clearinghouse_state_wraps_errors(error):
+    tracker = HyperliquidPositionTracker()
+    with pytest.raises(HyperliquidAPIError):
+        asyncio.run(tracker.fetch_clearinghouse_state(FailingSession(error), '0xabc'))
+    assert '0xabc' not in tracker._state_cache
@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+import import_historical_data
+from import_historical_data import _is_rejection, _is_transient, _iter_arrow_records, import_csv_to_supabase
+
+def api_error(code):
+    return APIError({'message': 'failed', 'code': code})
+
+@pytest.mark.parametrize('error', [
+    httpx.ConnectError('refused'),
+    httpx.ReadTimeout('slow'),
+    api_error(408),
+    api_error('429'),
+    api_error(500),
+    api_error('503'),
+    api_error('PGRST000'),
+    api_error('PGRST003'),
+])
+def test_transient_errors(error):
+    assert _is_transient(error)
+
+@pytest.mark.parametrize('error', [
+    api_error('400'),
+    api_error('409'),
+    api_error('23505'),  # unique_violation
+    api_error('57014'),  # query_canceled is a SQLSTATE, not an HTTP 5xx
+    api_error('42P01'),  # undefined_table
+    api_error('PGRST205'),
+    api_error(None),
+    ValueError('bad value'),
+    TypeError('not serializable'),
+])
+def test_permanent_errors(error):
+    assert not _is_transient(error)
+
+@pytest.mark.parametrize('code, rejected', [
+    ('400', True), (409, True), ('422', True), ('22P02', True), ('23505', True),
+    ('401', False), ('403', False), ('404', False), ('42P01', False), ('PGRST205', False), ('503', False),
+])
+def test_rejections(code, rejected):
+    assert _is_rejection(api_error(code)) is rejected
+
+class FakeTable:
+    def __init__(self, client):
+        self.client = client
+    
+    def insert(self, batch, returning=None):
+        self.batch = batch
+        return self
+    
+    async def execute(self):
+        self.client.calls.append(len(self.batch))
+        if self.client.errors:
+            raise self.client.errors.pop(0)
+
+class FakeClient:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = []
+    
+    def table(self, name):
+        return FakeTable(self)
+
+def run_import(tmp_path, monkeypatch, client):
+    csv_path = tmp_path / 'positions.csv'
+    csv_path.write_text('timestamp,coin,size\n2024-01-01 00:00:00,BTC,1.5\n2024-01-01 00:01:00,ETH,2\n')
+    
+    async def acreate_client(url, key):
+        return client
+    
+    monkeypatch.setenv('SUPABASE_URL', 'https://example.supabase.co')
+    monkeypatch.setenv('SUPABASE_KEY', 'key')
+    monkeypatch.delenv('SUPABASE_DB_URL', raising=False)
+    monkeypatch.setattr(import_historical_data, 'acreate_client', acreate_client)
+    monkeypatch.setattr(import_historical_data, 'RETRY_BASE_DELAY', 0)
+    return asyncio.run(import_csv_to_supabase(str(csv_path), 'position_history'))
+
+def test_transient_failures_are_retried(tmp_path, monkeypatch):
+    client = FakeClient([httpx.ConnectError('refused'), api_error(503)])
+    assert run_import(tmp_path, monkeypatch, client) == (2, 0)
+    assert client.calls == [2, 2, 2]
+
+def test_rejected_batches_are_split_without_retrying(tmp_path, monkeypatch):
+    client = FakeClient([api_error('400'), api_error('400')])
+    assert run_import(tmp_path, monkeypatch, client) == (1, 1)
+    assert client.calls == [2, 1, 1]
+
+@pytest.mark.parametrize('code', ['401', '403', '42P01', 'PGRST205'])
+def test_systematic_failures_abort_after_one_request(tmp_path, monkeypatch, code):
+    client = FakeClient([api_error(code)])
+    with pytest.raises(APIError):
+        run_import(tmp_path, monkeypatch, client)
+    assert client.calls == [2]
+
+def test_outages_abort_once_retries_run_out(tmp_path, monkeypatch):
+    client = FakeClient([httpx.ConnectError('refused')] * 5)
+    with pytest.raises(httpx.ConnectError):
+        run_import(tmp_path, monkeypatch, client)
+    assert client.calls == [2] * 5
+
+def test_unexpected_errors_propagate(tmp_path, monkeypatch):
+    with pytest.raises(TypeError):
+        run_import(tmp_path, monkeypatch, FakeClient([TypeError('not serializable')]))
+
+def test_arrow_records_keep_float_columns_across_blocks(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    csv_path = tmp_path / 'metrics.csv'
+    lines = ['timestamp,account_value,portfolio_heat']
+    lines += ['2024-01-01 00:00:00,1000,0'] * 20 + ['2024-01-01 00:01:00,1000.5,12.25'] * 20
+    csv_path.write_text('\n'.join(lines) + '\n')
+    monkeypatch.setattr(import_historical_data, 'ARROW_BLOCK_SIZE', 256)
+    
+    records = [record for batch in _iter_arrow_records(str(csv_path)) for record in batch]
+    assert len(records) == 40
+    assert records[0] == {'timestamp': '2024-01-01T00:00:00', 'account_value': 1000.0, 'portfolio_heat': 0.0}
+    assert records[-1]['portfolio_heat'] == 12.25
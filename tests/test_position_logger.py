@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import position_logger
+from hyperliquid_positions import HyperliquidPosition
+from position_logger import POSITION_COLUMNS, CSVBackend, PositionLogger, QueuedBackend
+
+class RecordingBackend:
+    """Backend stub that keeps every batch it is handed"""
+    def __init__(self):
+        self.positions = []
+        self.metrics = []
+    
+    def write_positions(self, rows):
+        self.positions.append(rows)
+    
+    def write_metrics(self, rows):
+        self.metrics.append(rows)
+
+def make_position(coin, **overrides):
+    fields = dict(coin=coin, side='long', size=1.5, entry_price=100.0, leverage=5.0,
+                  liquidation_price=80.0, unrealized_pnl=12.5, realized_pnl=-1.0, margin_used=30.0)
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+def test_log_positions_rows():
+    backend = RecordingBackend()
+    logger = PositionLogger(backend=backend)
+    timestamp = datetime(2024, 1, 2, 3, 4, 5)
+    positions = [
+        HyperliquidPosition(coin='BTC', side='long', size=0.5, leverage=5.0, entry_price=40000.0,
+                            liquidation_price=32000.0, unrealized_pnl=250.0, realized_pnl=10.0,
+                            margin_used=4000.0, timestamp=timestamp),
+        HyperliquidPosition(coin='ETH', side='short', size=3.0, leverage=10.0, entry_price=2000.0,
+                            liquidation_price=0.0, unrealized_pnl=-15.5, realized_pnl=0.0,
+                            margin_used=600.0, timestamp=timestamp),
+    ]
+    logger.log_positions(positions, timestamp)
+    
+    assert backend.positions == [[
+        dict(timestamp='2024-01-02 03:04:05', coin='BTC', side='long', size=0.5, entry_price=40000.0,
+             leverage=5.0, liquidation_price=32000.0, unrealized_pnl=250.0, realized_pnl=10.0,
+             margin_used=4000.0),
+        dict(timestamp='2024-01-02 03:04:05', coin='ETH', side='short', size=3.0, entry_price=2000.0,
+             leverage=10.0, liquidation_price=0.0, unrealized_pnl=-15.5, realized_pnl=0.0,
+             margin_used=600.0),
+    ]]
+    # Column order is the CSV header order
+    assert all(tuple(row) == POSITION_COLUMNS for row in backend.positions[0])
+
+def test_log_positions_without_positions():
+    backend = RecordingBackend()
+    PositionLogger(backend=backend).log_positions([])
+    assert backend.positions == [[]]
+
+def test_csv_positions_round_trip(tmp_path):
+    logger = PositionLogger(log_dir=str(tmp_path))
+    now = datetime.now()
+    logger.log_positions([make_position('BTC'), make_position('ETH', side='short', size=2)], now)
+    
+    history = logger.get_position_history()
+    assert list(history['coin']) == ['BTC', 'ETH']
+    assert list(history['side']) == ['long', 'short']
+    assert history['size'].tolist() == [1.5, 2.0]
+    assert history['unrealized_pnl'].tolist() == [12.5, 12.5]
+    assert (history['timestamp'] == pd.Timestamp(now)).all()
+    
+    eth = logger.get_position_history(coin='ETH', timeframe=timedelta(hours=1), columns=['size'])
+    assert list(eth.columns) == ['timestamp', 'coin', 'size']
+    assert eth['size'].tolist() == [2.0]
+
+def test_csv_appends_across_calls(tmp_path):
+    logger = PositionLogger(log_dir=str(tmp_path))
+    logger.log_positions([make_position('BTC')])
+    logger.log_positions([make_position('BTC', unrealized_pnl=20.0)])
+    
+    # The second read sees the new file version rather than the cached first read
+    assert logger.get_position_history()['unrealized_pnl'].tolist() == [12.5, 20.0]
+
+def test_queued_csv_metrics_round_trip(tmp_path):
+    logger = PositionLogger(backend=QueuedBackend(CSVBackend(str(tmp_path)), linger=0.01))
+    summary = dict(account_value=1000.0, total_position_value=500.0, total_margin_used=100.0,
+                   withdrawable=900.0, total_unrealized_pnl=25.0, account_leverage=0.5)
+    metrics = {'portfolio_risks': dict(total_exposure_usd=500.0, exposure_to_equity_ratio=0.5,
+                                       portfolio_heat=10.0, risk_adjusted_return=1.2,
+                                       margin_utilization=10.0, concentration_score=50.0)}
+    logger.log_positions([make_position('BTC')])
+    logger.log_metrics(metrics, summary)
+    
+    assert logger.get_position_history()['coin'].tolist() == ['BTC']
+    history = logger.get_metrics_history(columns=['account_value', 'portfolio_heat'])
+    assert history['account_value'].tolist() == [1000.0]
+    assert history['portfolio_heat'].tolist() == [10.0]
+
+def test_arrow_types_hold_across_blocks(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    # Tiny blocks so the whole-number prices at the top don't decide the column types
+    monkeypatch.setattr(position_logger, 'ARROW_BLOCK_SIZE', 256)
+    logger = PositionLogger(log_dir=str(tmp_path))
+    logger.log_positions([make_position('BTC', liquidation_price=0, entry_price=40000)] * 10)
+    logger.log_positions([make_position('ETH', liquidation_price=1999.5, entry_price=2000.25)] * 10)
+    
+    history = logger.get_position_history(columns=['entry_price', 'liquidation_price'])
+    assert history['liquidation_price'].dtype == 'float64'
+    assert history['liquidation_price'].tolist() == [0.0] * 10 + [1999.5] * 10
+    assert history['entry_price'].tolist()[-1] == 2000.25
+
+def test_supabase_insert_sends_orjson_body():
+    pytest.importorskip('orjson')
+    import httpx
+    import numpy as np
+    import orjson
+    from supabase import ClientOptions, create_client
+    
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(201)
+    
+    http_client = position_logger.OrjsonClient(transport=httpx.MockTransport(handler))
+    client = create_client('https://example.supabase.co', 'service-key',
+                           options=ClientOptions(httpx_client=http_client))
+    rows = [{'timestamp': '2024-01-02 03:04:05', 'coin': 'BTC', 'size': np.float64(0.5),
+             'leverage': np.int64(5), 'margin_used': 4000.0}]
+    position_logger.SupabaseBackend(client=client)._insert('position_history', rows)
+    
+    (request,) = requests
+    assert request.method == 'POST'
+    assert request.url.path.endswith('/position_history')
+    assert request.headers['Content-Type'] == 'application/json'
+    assert request.content == orjson.dumps(rows, option=orjson.OPT_SERIALIZE_NUMPY)
+    assert orjson.loads(request.content) == [{'timestamp': '2024-01-02 03:04:05', 'coin': 'BTC',
+                                              'size': 0.5, 'leverage': 5, 'margin_used': 4000.0}]
+
+class FakeSupabase:
+    """Records inserts; SupabaseBackend._fetch is replaced in the tests that read"""
+    def __init__(self):
+        self.inserted = []
+    
+    def table(self, name):
+        return self
+    
+    def insert(self, rows, returning=None):
+        self.inserted.extend(rows)
+        return self
+    
+    def execute(self):
+        return None
+
+def test_supabase_cache_cleared_by_writes():
+    backend = position_logger.SupabaseBackend(client=FakeSupabase())
+    fetches = []
+    backend._fetch = lambda *args: fetches.append(args) or pd.DataFrame({'n': [len(fetches)]})
+    
+    assert backend.read_metrics()['n'].tolist() == [1]
+    assert backend.read_metrics()['n'].tolist() == [1]
+    backend.write_metrics([{'account_value': 1.0}])
+    assert backend.read_metrics()['n'].tolist() == [2]
+
+def test_supabase_read_overlapping_a_write_is_not_cached():
+    backend = position_logger.SupabaseBackend(client=FakeSupabase())
+    fetches = []
+    
+    def fetch(*args):
+        fetches.append(args)
+        if len(fetches) == 1:
+            # The queue's writer thread flushes while this read is in flight
+            backend.write_metrics([{'account_value': 1.0}])
+        return pd.DataFrame({'n': [len(fetches)]})
+    
+    backend._fetch = fetch
+    assert backend.read_metrics()['n'].tolist() == [1]
+    assert backend.read_metrics()['n'].tolist() == [2]
+    assert backend.read_metrics()['n'].tolist() == [2]
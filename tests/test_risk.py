@@ -0,0 +1,65 @@
+import dataclasses
+
+import pytest
+
+from risk import Position, RiskManager, Side
+
+def make_manager():
+    manager = RiskManager(account_equity=100_000, max_position_pct=50)
+    assert manager.add_position(Position('BTC', Side.LONG, 0.5, 40_000, 5, liquidation_price=32_000))
+    assert manager.add_position(Position('ETH', Side.SHORT, 4, 2_000, 2, unrealized_pnl=-50))
+    return manager
+
+def test_portfolio_totals():
+    metrics = make_manager().calculate_portfolio_metrics()
+    assert metrics['total_position_value'] == 28_000
+    assert metrics['total_exposure'] == 20_000 * 5 + 8_000 * 2
+    assert metrics['unrealized_pnl'] == -50
+
+def test_update_unrealized_pnl_refreshes_totals_and_position():
+    manager = make_manager()
+    manager.calculate_portfolio_metrics()
+    manager.update_unrealized_pnl(0, 250)
+    assert manager.calculate_portfolio_metrics()['unrealized_pnl'] == 200
+    assert manager.get_position('BTC').unrealized_pnl == 250
+    assert manager.positions[0] is manager.get_position('BTC')
+
+@pytest.mark.parametrize('index', [-1, 2, 16])
+def test_update_unrealized_pnl_rejects_bad_index(index):
+    manager = make_manager()
+    manager.calculate_portfolio_metrics()
+    with pytest.raises(IndexError):
+        manager.update_unrealized_pnl(index, 100)
+    assert [position.unrealized_pnl for position in manager.positions] == [0.0, -50]
+    assert manager.calculate_portfolio_metrics()['unrealized_pnl'] == -50
+    
+    manager.add_position(Position('SOL', Side.LONG, 10, 100, 1))
+    assert manager.calculate_portfolio_metrics()['unrealized_pnl'] == -50
+
+def test_positions_are_read_only():
+    manager = make_manager()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        manager.get_position('BTC').size = 10
+    with pytest.raises(AttributeError):
+        manager.positions.append(Position('SOL', Side.LONG, 1, 100, 1))
+    assert len(manager.positions) == 2
+    assert manager.calculate_portfolio_metrics()['total_position_value'] == 28_000
+
+@pytest.mark.filterwarnings('error')
+def test_try_add_batch_matches_add_position():
+    manager = RiskManager(account_equity=100_000, max_position_pct=50)
+    accepted = manager.try_add_batch(['BTC', 'ETH'], [Side.LONG, Side.SHORT], [0.5, 4], [40_000, 2_000], [5, 20])
+    assert accepted.tolist() == [True, False]
+    assert [position.symbol for position in manager.positions] == ['BTC']
+    assert manager.calculate_portfolio_metrics()['total_exposure'] == 100_000
+    
+    # Zero equity makes the %-of-equity check inf * 0 = NaN for an empty position
+    sizes, prices = [0, 1], [100, 100]
+    batch = RiskManager(account_equity=0)
+    accepted = batch.try_add_batch(['BTC', 'ETH'], [Side.LONG, Side.SHORT], sizes, prices, [1, 1])
+    
+    single = RiskManager(account_equity=0)
+    expected = [single.add_position(Position(symbol, side, size, price, 1))
+                for symbol, side, size, price in zip(['BTC', 'ETH'], [Side.LONG, Side.SHORT], sizes, prices)]
+    assert expected == [True, False]
+    assert accepted.tolist() == expected
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from risk import Position, RiskManager, Side
+from risk_kernels import batch_position_risk, running_max_drawdown
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PARALLEL_CHECK = """
+import numpy as np
+import risk_kernels
+
+ones = np.ones(risk_kernels.PARALLEL_MIN_POSITIONS)
+risk_kernels.batch_position_risk(ones, ones, ones, np.ones(len(ones), dtype=np.int8), ones, ones)
+dispatcher = risk_kernels._position_risk_parallel
+metadata = dispatcher.overloads[dispatcher.signatures[0]].metadata
+# A build loaded from the on-disk cache carries no metadata; a parallel one has parfors
+print(0 if metadata is None else metadata['parfor_diagnostics'].count_parfors())
+"""
+
+def test_parallel_kernel_compiles_with_parfors(tmp_path):
+    pytest.importorskip('numba')
+    env = dict(os.environ, NUMBA_CACHE_DIR=str(tmp_path))
+    # The second run starts with the serial build already cached
+    for _ in range(2):
+        result = subprocess.run([sys.executable, '-c', PARALLEL_CHECK], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+        assert int(result.stdout.strip()) > 0, result.stdout
+
+def test_batch_position_risk_matches_calculate_position_risk():
+    manager = RiskManager(account_equity=100_000, max_position_pct=50)
+    positions = [
+        Position('BTC', Side.LONG, 0.5, 40_000, 5, liquidation_price=32_000),
+        Position('ETH', Side.SHORT, 4, 2_000, 2, liquidation_price=2_900),
+        Position('SOL', Side.SHORT, 50, 100, 3),
+    ]
+    for position in positions:
+        assert manager.add_position(position)
+    current_prices = [41_000.0, 1_900.0, 110.0]
+    
+    batch = manager.batch_position_risk(current_prices)
+    for i, (position, price) in enumerate(zip(positions, current_prices)):
+        expected = manager.calculate_position_risk(position, price)
+        assert set(batch) == set(expected)
+        for key, value in expected.items():
+            assert batch[key][i] == pytest.approx(value), key
+    assert batch['distance_to_liquidation'][2] == 0.0
+    
+    # The module-level kernel takes the same columns directly
+    ones = np.ones(3)
+    values, pnl, roe, distance = batch_position_risk(ones, ones * 100, ones, np.array([1, -1, 1], dtype=np.int8),
+                                                     np.array([90.0, 0.0, 0.0]), np.array([110.0, 110.0, 100.0]))
+    assert pnl.tolist() == pytest.approx([10.0, -10.0, 0.0])
+    assert distance.tolist() == pytest.approx([20 / 110 * 100, 0.0, 0.0])
+
+def test_running_max_drawdown():
+    assert running_max_drawdown(np.array([100.0, 120.0, 90.0, 130.0, 117.0])) == pytest.approx(25.0)
+    assert running_max_drawdown(np.array([100.0, 110.0, 120.0])) == 0.0
+    assert running_max_drawdown(np.array([])) == 0.0
+
+def test_check_drawdown_series():
+    manager = RiskManager(account_equity=100_000, max_drawdown_pct=15)
+    assert manager.check_drawdown_series([100.0, 120.0, 90.0, 130.0]) == {
+        'max_drawdown_pct': pytest.approx(25.0),
+        'max_drawdown_warning': True,
+        'remaining_drawdown': pytest.approx(-10.0),
+    }
+    assert manager.check_drawdown_series([]) == {
+        'max_drawdown_pct': 0.0,
+        'max_drawdown_warning': False,
+        'remaining_drawdown': 15,
+    }
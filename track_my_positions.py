@@ -1,9 +1,60 @@
 from hyperliquid_positions import HyperliquidPositionTracker
 from dotenv import load_dotenv
+from typing import List, Optional
+import aiohttp
+import argparse
+import asyncio
 import os
+import sys
+import time
 
-def track_wallet(wallet_address: str):
-    tracker = HyperliquidPositionTracker()
+def _render_report(positions, summary, risk_metrics) -> str:
+    """Format positions, account summary and risk metrics as one block of text"""
+    lines = ["\n=== Open Positions with Risk Metrics ==="]
+    for pos in positions:
+        pos_risk = risk_metrics["position_risks"].get(pos.coin, {})
+        lines.append(f"\n{pos.coin} {pos.side.upper()}")
+        lines.append(f"├── Size: {pos.size:.4f}")
+        lines.append(f"├── Entry Price: ${pos.entry_price:.2f}")
+        lines.append(f"├── Current PnL: ${pos.unrealized_pnl:.2f}")
+        lines.append(f"├── Leverage: {pos.leverage}x")
+        lines.append(f"├── Liquidation Price: ${pos.liquidation_price:.2f}")
+        lines.append(f"├── Distance to Liquidation: {pos_risk.get('distance_to_liquidation', 0):.2f}%")
+        lines.append(f"├── Position Value: ${pos_risk.get('position_value_usd', 0):,.2f}")
+        lines.append(f"├── % of Account: {pos_risk.get('pct_of_account', 0):.2f}%")
+        lines.append(f"└── Risk Score: {pos_risk.get('risk_score', 0):.1f}/100")
+    
+    # Account summary
+    lines.append("\n=== Account Summary ===")
+    lines.append(f"Account Value: ${summary['account_value']:,.2f}")
+    lines.append(f"Total Position Value: ${summary['total_position_value']:,.2f}")
+    lines.append(f"Total Margin Used: ${summary['total_margin_used']:,.2f}")
+    lines.append(f"Free Margin (Withdrawable): ${summary['withdrawable']:,.2f}")
+    lines.append(f"Margin Utilization: {(summary['total_margin_used'] / summary['account_value']) * 100:.1f}%")
+    lines.append(f"Free Margin Ratio: {(summary['withdrawable'] / summary['account_value']) * 100:.1f}%")
+    lines.append(f"Total Unrealized PnL: ${summary['total_unrealized_pnl']:,.2f}")
+    lines.append(f"Account Leverage: {summary['account_leverage']:.2f}x")
+
+    # Portfolio risk metrics
+    lines.append("\n=== Portfolio Risk Metrics ===")
+    portfolio_risks = risk_metrics["portfolio_risks"]
+    lines.append(f"Total Exposure: ${portfolio_risks['total_exposure_usd']:,.2f}")
+    lines.append(f"Exposure/Equity Ratio: {portfolio_risks['exposure_to_equity_ratio']:.2f}")
+    lines.append(f"Portfolio Heat: {portfolio_risks['portfolio_heat']:.1f}")
+    lines.append(f"Risk-Adjusted Return: {portfolio_risks['risk_adjusted_return']:.2f}")
+    lines.append(f"Margin Utilization: {portfolio_risks['margin_utilization']:.1f}%")
+    lines.append(f"Concentration Score: {portfolio_risks['concentration_score']:.1f}")
+
+    # Risk warnings
+    if risk_metrics["risk_warnings"]:
+        lines.append("\n=== Risk Warnings ===")
+        for warning in risk_metrics["risk_warnings"]:
+            lines.append(warning)
+    
+    return "\n".join(lines)
+
+def track_wallet(wallet_address: str, tracker: Optional[HyperliquidPositionTracker] = None):
+    tracker = tracker or HyperliquidPositionTracker()
     
     try:
         print(f"\nFetching positions for {wallet_address}...")
@@ -17,58 +68,58 @@ def track_wallet(wallet_address: str):
             print("No open positions found")
             return
             
-        # Print positions with risk metrics
-        print("\n=== Open Positions with Risk Metrics ===")
-        for pos in positions:
-            pos_risk = risk_metrics["position_risks"].get(pos.coin, {})
-            print(f"\n{pos.coin} {pos.side.upper()}")
-            print(f"├── Size: {pos.size:.4f}")
-            print(f"├── Entry Price: ${pos.entry_price:.2f}")
-            print(f"├── Current PnL: ${pos.unrealized_pnl:.2f}")
-            print(f"├── Leverage: {pos.leverage}x")
-            print(f"├── Liquidation Price: ${pos.liquidation_price:.2f}")
-            print(f"├── Distance to Liquidation: {pos_risk.get('distance_to_liquidation', 0):.2f}%")
-            print(f"├── Position Value: ${pos_risk.get('position_value_usd', 0):,.2f}")
-            print(f"├── % of Account: {pos_risk.get('pct_of_account', 0):.2f}%")
-            print(f"└── Risk Score: {pos_risk.get('risk_score', 0):.1f}/100")
-        
-        # Print account summary
-        print("\n=== Account Summary ===")
-        print(f"Account Value: ${summary['account_value']:,.2f}")
-        print(f"Total Position Value: ${summary['total_position_value']:,.2f}")
-        print(f"Total Margin Used: ${summary['total_margin_used']:,.2f}")
-        print(f"Free Margin (Withdrawable): ${summary['withdrawable']:,.2f}")
-        print(f"Margin Utilization: {(summary['total_margin_used'] / summary['account_value']) * 100:.1f}%")
-        print(f"Free Margin Ratio: {(summary['withdrawable'] / summary['account_value']) * 100:.1f}%")
-        print(f"Total Unrealized PnL: ${summary['total_unrealized_pnl']:,.2f}")
-        print(f"Account Leverage: {summary['account_leverage']:.2f}x")
-
-        # Print portfolio risk metrics
-        print("\n=== Portfolio Risk Metrics ===")
-        portfolio_risks = risk_metrics["portfolio_risks"]
-        print(f"Total Exposure: ${portfolio_risks['total_exposure_usd']:,.2f}")
-        print(f"Exposure/Equity Ratio: {portfolio_risks['exposure_to_equity_ratio']:.2f}")
-        print(f"Portfolio Heat: {portfolio_risks['portfolio_heat']:.1f}")
-        print(f"Risk-Adjusted Return: {portfolio_risks['risk_adjusted_return']:.2f}")
-        print(f"Margin Utilization: {portfolio_risks['margin_utilization']:.1f}%")
-        print(f"Concentration Score: {portfolio_risks['concentration_score']:.1f}")
-
-        # Print risk warnings
-        if risk_metrics["risk_warnings"]:
-            print("\n=== Risk Warnings ===")
-            for warning in risk_metrics["risk_warnings"]:
-                print(warning)
+        # Write the whole report in one call rather than one print per line
+        sys.stdout.write(_render_report(positions, summary, risk_metrics) + "\n")
         
     except Exception as e:
         print(f"Error tracking positions: {str(e)}")
 
+async def track_wallets(wallet_addresses: List[str], continuous: bool = False, interval: int = 60):
+    """
+    Fetch every wallet's state concurrently, then report on each in turn
+    
+    Args:
+        wallet_addresses: Wallet addresses in hex format
+        continuous: Keep polling every `interval` seconds instead of reporting once
+        interval: Seconds between polls in continuous mode
+    """
+    tracker = HyperliquidPositionTracker()
+    next_poll = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        while True:
+            # Failures are left for track_wallet, which retries the fetch and reports the error
+            await asyncio.gather(
+                *(tracker.fetch_clearinghouse_state(session, wallet) for wallet in wallet_addresses),
+                return_exceptions=True
+            )
+            
+            for wallet_address in wallet_addresses:
+                track_wallet(wallet_address, tracker)
+            
+            if not continuous:
+                return
+            
+            # Sleep until the next scheduled poll so slow cycles don't stretch the period;
+            # if a cycle overran a whole interval, skip the missed polls and restart from now
+            next_poll += interval
+            delay = next_poll - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_poll = time.monotonic()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report Hyperliquid positions with risk metrics")
+    parser.add_argument('--continuous', action='store_true', help="keep polling instead of reporting once")
+    parser.add_argument('--interval', type=int, default=60, help="seconds between polls (default: 60)")
+    args = parser.parse_args()
+    
     # Load environment variables
     load_dotenv()
     
-    # Get wallet address from environment
-    wallet_address = os.getenv('WALLET_ADDRESS')
-    if not wallet_address:
+    # Get wallet addresses from environment (comma-separated to track several)
+    wallet_addresses = [w.strip() for w in os.getenv('WALLET_ADDRESS', '').split(',') if w.strip()]
+    if not wallet_addresses:
         raise ValueError("WALLET_ADDRESS not found in .env file")
         
-    track_wallet(wallet_address) 
\ No newline at end of file
+    asyncio.run(track_wallets(wallet_addresses, args.continuous, args.interval)) 
\ No newline at end of file